@@ -15,7 +15,7 @@
       devShells = forAllSystems ({ pkgs }: {
         default = pkgs.mkShell {
           packages = with pkgs; [
-            python312
+            (python312.withPackages (ps: [ ps.orjson ]))
             jq
             p7zip
           ];
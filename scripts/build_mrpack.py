@@ -2,10 +2,21 @@
 from __future__ import annotations
 
 import argparse
+import io
 import json
+import os
+import sys
+import time
 import tomllib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from zipfile import ZIP_DEFLATED, ZipFile
+from typing import IO
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib json module is the fallback
+    orjson = None
 
 REQUIRED_TEMPLATE_KEYS = [
     "formatVersion",
@@ -16,11 +27,19 @@ REQUIRED_TEMPLATE_KEYS = [
     "dependencies",
 ]
 
-VALID_SIDES = {"both", "client", "server"}
+VALID_SIDES = frozenset({"both", "client", "server"})
+VALID_SIDES_SORTED = sorted(VALID_SIDES)
+HASH_HEX_LENGTHS = {"sha1": 40, "sha512": 128}
 SIDE_LABELS = {"client": "Client", "server": "Server"}
+# Shared per-side env tables; file records only ever serialize them.
+ENV_BY_SIDE = {
+    "both": {"client": "required", "server": "required"},
+    "client": {"client": "required", "server": "unsupported"},
+    "server": {"client": "unsupported", "server": "required"},
+}
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Build Prism-importable .mrpack files for client/server from lock manifests"
     )
@@ -33,19 +52,44 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--dist", default="")
     parser.add_argument("--slug", default="")
     parser.add_argument("--side", default="")
-    return parser.parse_args()
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        default=1,
+        choices=range(10),
+        metavar="0-9",
+        help="Deflate level for the .mrpack (1 is fastest, 9 is smallest)",
+    )
+    return parser.parse_args(argv)
 
 
 def read_json(path: Path) -> object:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    raw = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dump_json(data: object, raw: IO[bytes]) -> None:
+    if orjson is not None:
+        raw.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+        return
+    # Encode incrementally so the full document is never held as one str.
+    # ensure_ascii=False matches orjson's raw UTF-8 output byte for byte.
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    json.dump(data, text, indent=2, ensure_ascii=False)
+    text.write("\n")
+    text.detach()
 
 
 def read_pack_build_defaults(path: Path) -> dict[str, str]:
     if not path.exists():
         return {}
-    with path.open("rb") as f:
-        data = tomllib.load(f)
+    data = tomllib.loads(path.read_text(encoding="utf-8"))
+    return pack_build_defaults(data)
+
+
+def pack_build_defaults(data: object) -> dict[str, str]:
     if not isinstance(data, dict):
         return {}
     build = data.get("build")
@@ -71,6 +115,45 @@ def validate_template(template: dict) -> None:
         raise ValueError(f"Template missing required keys: {', '.join(missing)}")
 
 
+def is_nonempty_str_list(raw: object) -> bool:
+    # A plain loop rather than all(<genexpr>): this runs once per lock entry
+    # and the generator setup dominates for the usual one-item download list.
+    if not isinstance(raw, list) or not raw:
+        return False
+    for item in raw:
+        if not isinstance(item, str) or not item:
+            return False
+    return True
+
+
+def are_hex_digests(digests: list[object], length: int) -> bool:
+    if not digests:
+        return True
+    # Join and decode every digest in one bytes.fromhex call so the charset
+    # check runs in C. fromhex skips whitespace, which the decoded length
+    # catches; non-str digests make join raise TypeError.
+    try:
+        joined = "".join(digests)
+        if set(map(len, digests)) != {length}:
+            return False
+        return len(bytes.fromhex(joined)) * 2 == len(joined)
+    except (TypeError, ValueError):
+        return False
+
+
+def validate_hash_digests(entries: list[dict], manifest_name: str) -> None:
+    hash_tables = [entry["hashes"] for entry in entries]
+    for algo, length in HASH_HEX_LENGTHS.items():
+        if are_hex_digests([h[algo] for h in hash_tables if algo in h], length):
+            continue
+        # Slow path only on failure: locate the offending entry for the message.
+        for i, hashes in enumerate(hash_tables):
+            if algo in hashes and not are_hex_digests([hashes[algo]], length):
+                raise ValueError(
+                    f"{manifest_name}[{i}].hashes.{algo} must be a {length}-character hex digest"
+                )
+
+
 def validate_entries(entries: object, manifest_name: str) -> list[dict]:
     if not isinstance(entries, list):
         raise ValueError(f"{manifest_name} must be a JSON array")
@@ -89,11 +172,9 @@ def validate_entries(entries: object, manifest_name: str) -> list[dict]:
             raise ValueError(f"{manifest_name}[{i}].filename must be a non-empty string")
         if side not in VALID_SIDES:
             raise ValueError(
-                f"{manifest_name}[{i}].side must be one of {sorted(VALID_SIDES)}"
+                f"{manifest_name}[{i}].side must be one of {VALID_SIDES_SORTED}"
             )
-        if not isinstance(downloads, list) or not downloads or not all(
-            isinstance(url, str) and url for url in downloads
-        ):
+        if not is_nonempty_str_list(downloads):
             raise ValueError(
                 f"{manifest_name}[{i}].downloads must be a non-empty array of URLs"
             )
@@ -104,54 +185,80 @@ def validate_entries(entries: object, manifest_name: str) -> list[dict]:
         if not isinstance(file_size, int) or file_size <= 0:
             raise ValueError(f"{manifest_name}[{i}].fileSize must be an integer > 0")
 
+    validate_hash_digests(entries, manifest_name)
     return entries
 
 
-def env_for_side(side: str) -> dict[str, str]:
-    if side == "client":
-        return {"client": "required", "server": "unsupported"}
-    if side == "server":
-        return {"client": "unsupported", "server": "required"}
-    return {"client": "required", "server": "required"}
-
-
-def build_files(entries: list[dict], side: str, path_prefix: str) -> list[dict]:
-    files: list[dict] = []
-    for entry in entries:
-        if entry["side"] not in ("both", side):
-            continue
-        files.append(
-            {
-                "path": f"{path_prefix}/{entry['filename']}",
-                "hashes": entry["hashes"],
-                "downloads": entry["downloads"],
-                "fileSize": entry["fileSize"],
-                "env": env_for_side(entry["side"]),
-            }
-        )
-    return files
-
-
-def write_zip(output_path: Path, index_data: dict) -> None:
-    with ZipFile(output_path, "w", compression=ZIP_DEFLATED) as zf:
-        zf.writestr("modrinth.index.json", json.dumps(index_data, indent=2) + "\n")
+def build_files(entries: list[dict], path_prefix: str) -> list[dict]:
+    return [
+        {
+            "path": f"{path_prefix}/{entry['filename']}",
+            "hashes": entry["hashes"],
+            "downloads": entry["downloads"],
+            "fileSize": entry["fileSize"],
+            "env": ENV_BY_SIDE[entry["side"]],
+        }
+        for entry in entries
+    ]
+
+
+def partition_by_side(entries: list[dict], files: list[dict]) -> dict[str, list[dict]]:
+    # A file record does not depend on the side being built, so both sides
+    # share the same record objects.
+    return {
+        build_side: [
+            file for entry, file in zip(entries, files) if entry["side"] in ("both", build_side)
+        ]
+        for build_side in SIDE_LABELS
+    }
+
+
+def write_zip(output_path: Path, index_data: dict, compress_level: int) -> None:
+    # Build next to the target and rename into place, so readers and parallel
+    # builds never observe a partially written archive.
+    tmp_path = output_path.with_suffix(f"{output_path.suffix}.tmp.{os.getpid()}")
+    try:
+        with ZipFile(
+            tmp_path,
+            "w",
+            compression=ZIP_DEFLATED,
+            compresslevel=compress_level,
+            allowZip64=False,
+        ) as zf:
+            # Explicit ZipInfo: opening by name would stamp 1980-01-01, whereas
+            # the archive has always recorded its build time like writestr does.
+            zinfo = ZipInfo("modrinth.index.json", date_time=time.localtime()[:6])
+            zinfo.compress_type = ZIP_DEFLATED
+            # ZipFile.open(ZipInfo, "w") takes the level from the ZipInfo, not
+            # the ZipFile, and would otherwise deflate at zlib's default of 6.
+            # 3.13 made the attribute public and kept _compresslevel as an alias.
+            if sys.version_info >= (3, 13):
+                zinfo.compress_level = compress_level
+            else:
+                zinfo._compresslevel = compress_level
+            with zf.open(zinfo, "w") as raw:
+                dump_json(index_data, raw)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
 
 def build_pack(
     *,
     template: dict,
-    mods: list[dict],
-    resource_packs: list[dict],
-    shader_packs: list[dict],
+    mods: dict[str, list[dict]],
+    resource_packs: dict[str, list[dict]],
+    shader_packs: dict[str, list[dict]],
     side: str,
     label: str,
     args: argparse.Namespace,
     slug: str,
     dist: str,
-) -> None:
-    mod_files = build_files(mods, side, "mods")
-    resource_pack_files = build_files(resource_packs, side, "resourcepacks")
-    shader_pack_files = build_files(shader_packs, side, "shaderpacks")
+) -> str:
+    mod_files = mods[side]
+    resource_pack_files = resource_packs[side]
+    shader_pack_files = shader_packs[side]
     files = [*mod_files, *resource_pack_files, *shader_pack_files]
 
     index_data = dict(template)
@@ -166,9 +273,9 @@ def build_pack(
     dist_dir.mkdir(parents=True, exist_ok=True)
     out = dist_dir / f"{slug}-{side}-{pack_version}.mrpack"
 
-    write_zip(out, index_data)
+    write_zip(out, index_data, args.compress_level)
 
-    print(
+    return (
         f"Built {out} "
         f"(mods: {len(mod_files)}, resource packs: {len(resource_pack_files)}, shader packs: {len(shader_pack_files)})"
     )
@@ -180,13 +287,16 @@ def sides_to_build(side: str) -> list[str]:
     return [side]
 
 
-def main() -> int:
-    args = parse_args()
-    build_defaults = read_pack_build_defaults(Path(args.pack))
+def main(argv: list[str] | None = None, pack_data: dict | None = None) -> int:
+    args = parse_args(argv)
+    if pack_data is not None:
+        build_defaults = pack_build_defaults(pack_data)
+    else:
+        build_defaults = read_pack_build_defaults(Path(args.pack))
 
     side = args.side or build_defaults.get("default_side", "both")
     if side not in VALID_SIDES:
-        raise ValueError(f"--side must be one of {sorted(VALID_SIDES)}")
+        raise ValueError(f"--side must be one of {VALID_SIDES_SORTED}")
 
     slug = args.slug or build_defaults.get("slug", "chuj")
     dist = args.dist or build_defaults.get("dist_dir", "dist")
@@ -210,12 +320,20 @@ def main() -> int:
     resource_packs = validate_entries(read_json(resource_packs_path), str(resource_packs_path))
     shader_packs = validate_entries(read_json(shader_packs_path), str(shader_packs_path))
 
-    for build_side in sides_to_build(side):
-        build_pack(
+    mods_by_side = partition_by_side(mods, build_files(mods, "mods"))
+    resource_packs_by_side = partition_by_side(
+        resource_packs, build_files(resource_packs, "resourcepacks")
+    )
+    shader_packs_by_side = partition_by_side(
+        shader_packs, build_files(shader_packs, "shaderpacks")
+    )
+
+    def build_side_pack(build_side: str) -> str:
+        return build_pack(
             template=template,
-            mods=mods,
-            resource_packs=resource_packs,
-            shader_packs=shader_packs,
+            mods=mods_by_side,
+            resource_packs=resource_packs_by_side,
+            shader_packs=shader_packs_by_side,
             side=build_side,
             label=SIDE_LABELS[build_side],
             args=args,
@@ -223,6 +341,13 @@ def main() -> int:
             dist=dist,
         )
 
+    # Each side writes its own archive from shared read-only inputs, and zlib
+    # releases the GIL while deflating, so the builds can overlap.
+    build_sides = sides_to_build(side)
+    with ThreadPoolExecutor(max_workers=len(build_sides)) as executor:
+        for summary in executor.map(build_side_pack, build_sides):
+            print(summary)
+
     return 0
 
 
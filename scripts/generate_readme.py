@@ -6,18 +6,17 @@ import tomllib
 from pathlib import Path
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Generate README.md from modpack/pack.toml"
     )
     parser.add_argument("--pack", default="modpack/pack.toml")
     parser.add_argument("--out", default="README.md")
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
 
 def read_toml(path: Path) -> dict:
-    with path.open("rb") as f:
-        data = tomllib.load(f)
+    data = tomllib.loads(path.read_text(encoding="utf-8"))
     if not isinstance(data, dict):
         raise ValueError(f"{path} must contain a TOML table")
     return data
@@ -156,9 +155,9 @@ def build_readme(data: dict) -> str:
     return "\n".join(lines) + "\n"
 
 
-def main() -> int:
-    args = parse_args()
-    data = read_toml(Path(args.pack))
+def main(argv: list[str] | None = None, pack_data: dict | None = None) -> int:
+    args = parse_args(argv)
+    data = pack_data if pack_data is not None else read_toml(Path(args.pack))
     out_text = build_readme(data)
 
     out_path = Path(args.out)
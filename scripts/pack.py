@@ -6,8 +6,17 @@ import subprocess
 import sys
 from pathlib import Path
 
+import build_mrpack
+import generate_readme
+import resolve_manifests
 
 SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_PACK = Path("modpack/pack.toml")
+STEP_MODULES = {
+    "resolve_manifests.py": resolve_manifests,
+    "generate_readme.py": generate_readme,
+    "build_mrpack.py": build_mrpack,
+}
 
 
 def run_step(script_name: str, extra_args: list[str]) -> None:
@@ -16,6 +25,28 @@ def run_step(script_name: str, extra_args: list[str]) -> None:
     subprocess.run(cmd, check=True)
 
 
+def run_inline(
+    script_name: str, extra_args: list[str], pack_data: dict | None = None
+) -> None:
+    print("+", script_name, *extra_args)
+    rc = STEP_MODULES[script_name].main(extra_args, pack_data=pack_data)
+    if rc:
+        raise SystemExit(rc)
+
+
+def run(
+    script_name: str,
+    extra_args: list[str],
+    *,
+    isolate: bool,
+    pack_data: dict | None = None,
+) -> None:
+    if isolate:
+        run_step(script_name, extra_args)
+    else:
+        run_inline(script_name, extra_args, pack_data)
+
+
 def strip_separator(args: list[str]) -> list[str]:
     if args and args[0] == "--":
         return args[1:]
@@ -23,19 +54,34 @@ def strip_separator(args: list[str]) -> list[str]:
 
 
 def parse_args() -> argparse.Namespace:
+    isolate_help = "Run each script in its own Python subprocess instead of in-process"
+    # Accepted before or after the subcommand. Subcommands default to SUPPRESS
+    # so they don't reset a top-level --isolate back to False.
+    isolate_flag = argparse.ArgumentParser(add_help=False)
+    isolate_flag.add_argument(
+        "--isolate", action="store_true", default=argparse.SUPPRESS, help=isolate_help
+    )
+
     parser = argparse.ArgumentParser(description="Unified CLI for CHUJ modpack scripts")
+    parser.add_argument("--isolate", action="store_true", help=isolate_help)
     subparsers = parser.add_subparsers(dest="command", required=True)
 
-    resolve = subparsers.add_parser("resolve", help="Run resolve_manifests.py")
+    resolve = subparsers.add_parser(
+        "resolve", parents=[isolate_flag], help="Run resolve_manifests.py"
+    )
     resolve.add_argument("args", nargs=argparse.REMAINDER, help="Args passed to resolver")
 
-    readme = subparsers.add_parser("readme", help="Run generate_readme.py")
+    readme = subparsers.add_parser("readme", parents=[isolate_flag], help="Run generate_readme.py")
     readme.add_argument("args", nargs=argparse.REMAINDER, help="Args passed to README generator")
 
-    build = subparsers.add_parser("build", help="Run build_mrpack.py")
+    build = subparsers.add_parser("build", parents=[isolate_flag], help="Run build_mrpack.py")
     build.add_argument("args", nargs=argparse.REMAINDER, help="Args passed to builder")
 
-    all_cmd = subparsers.add_parser("all", help="Resolve manifests, generate README, and build mrpacks")
+    all_cmd = subparsers.add_parser(
+        "all",
+        parents=[isolate_flag],
+        help="Resolve manifests, generate README, and build mrpacks",
+    )
     all_cmd.add_argument("--side", default="", help="Pass through to build_mrpack.py --side")
     all_cmd.add_argument("--version", default="", help="Pass through to build_mrpack.py --version")
 
@@ -45,28 +91,37 @@ def parse_args() -> argparse.Namespace:
 def main() -> int:
     args = parse_args()
 
+    isolate = args.isolate
+
     if args.command == "resolve":
-        run_step("resolve_manifests.py", strip_separator(args.args))
+        run("resolve_manifests.py", strip_separator(args.args), isolate=isolate)
         return 0
 
     if args.command == "readme":
-        run_step("generate_readme.py", strip_separator(args.args))
+        run("generate_readme.py", strip_separator(args.args), isolate=isolate)
         return 0
 
     if args.command == "build":
-        run_step("build_mrpack.py", strip_separator(args.args))
+        run("build_mrpack.py", strip_separator(args.args), isolate=isolate)
         return 0
 
     if args.command == "all":
-        run_step("resolve_manifests.py", ["--target", "all"])
-        run_step("generate_readme.py", [])
+        # In-process runs share one parse of pack.toml across every step.
+        pack_data = None
+        if not isolate:
+            if not DEFAULT_PACK.exists():
+                raise FileNotFoundError(f"Pack config not found: {DEFAULT_PACK}")
+            pack_data = resolve_manifests.read_toml(DEFAULT_PACK)
+
+        run("resolve_manifests.py", ["--target", "all"], isolate=isolate, pack_data=pack_data)
+        run("generate_readme.py", [], isolate=isolate, pack_data=pack_data)
 
         build_args: list[str] = []
         if args.side:
             build_args.extend(["--side", args.side])
         if args.version:
             build_args.extend(["--version", args.version])
-        run_step("build_mrpack.py", build_args)
+        run("build_mrpack.py", build_args, isolate=isolate, pack_data=pack_data)
         return 0
 
     raise ValueError(f"Unknown command: {args.command}")
@@ -3,21 +3,46 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
+import functools
+import http.client
 import json
+import os
+import tempfile
+import threading
 import tomllib
 import urllib.error
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib json module is the fallback
+    orjson = None
+
 USER_AGENT = "CHUJ-Pack-Resolver"
-VALID_SIDES = {"both", "client", "server"}
+VALID_SIDES = frozenset({"both", "client", "server"})
+VALID_SIDES_SORTED = sorted(VALID_SIDES)
+VALID_URL_SCHEMES = frozenset({"http", "https"})
+VALID_URL_HOSTS = frozenset({"modrinth.com", "www.modrinth.com"})
 SUPPORTED_LOADERS = ("fabric", "forge", "quilt", "neoforge")
 MODRINTH_FORMAT_VERSION = 1
 MODRINTH_GAME = "minecraft"
+# Top-level pack.toml table -> array key holding its entries in each category.
+CONTENT_SECTIONS = {"mods": "mods", "resourcepacks": "packs", "shaderpacks": "packs"}
+MAX_FETCH_WORKERS = 16
+REQUEST_TIMEOUT = 30
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+
+# Proxied requests and redirects go through urllib, which already handles
+# them. Direct requests reuse one keep-alive connection per host per thread,
+# so the TLS handshake is paid once per worker instead of once per request.
+_OPENER = urllib.request.build_opener()
+_CONNECTIONS = threading.local()
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Render template and resolve lock manifests from modpack/pack.toml"
     )
@@ -39,12 +64,21 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Validate and resolve without writing files",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--cache-dir",
+        default=".cache/modrinth",
+        help="Directory for cached Modrinth version lists (revalidated via ETag)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-download version lists and leave the cache untouched",
+    )
+    return parser.parse_args(argv)
 
 
 def read_toml(path: Path) -> dict:
-    with path.open("rb") as f:
-        data = tomllib.load(f)
+    data = tomllib.loads(path.read_text(encoding="utf-8"))
     if not isinstance(data, dict):
         raise ValueError(f"{path} must contain a TOML object")
     return data
@@ -52,6 +86,8 @@ def read_toml(path: Path) -> dict:
 
 def write_json(path: Path, data: object) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
+    # Always the stdlib encoder: these files are committed, and orjson would
+    # emit non-ASCII as raw UTF-8 instead of \uXXXX escapes.
     with path.open("w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
         f.write("\n")
@@ -101,11 +137,12 @@ def parse_template(data: dict) -> tuple[dict, str, str]:
     return template, minecraft, loader
 
 
+@functools.lru_cache(maxsize=1024)
 def normalize_project_url(url: str) -> str:
     parsed = urllib.parse.urlparse(url)
-    if parsed.scheme not in {"http", "https"}:
+    if parsed.scheme not in VALID_URL_SCHEMES:
         raise ValueError(f"Invalid project URL: {url}")
-    if parsed.netloc not in {"modrinth.com", "www.modrinth.com"}:
+    if parsed.netloc not in VALID_URL_HOSTS:
         raise ValueError(f"Unsupported host in URL: {url}")
 
     parts = [part for part in parsed.path.split("/") if part]
@@ -115,11 +152,7 @@ def normalize_project_url(url: str) -> str:
     return f"https://modrinth.com/project/{parts[1]}"
 
 
-def collect_entries(data: dict, top_key: str, item_key: str) -> list[dict]:
-    top = data.get(top_key)
-    if top is None:
-        return []
-
+def collect_entries(top: object, top_key: str, item_key: str) -> list[dict]:
     top_table = as_table(top, top_key)
     flattened: list[dict] = []
     for category, raw_category in top_table.items():
@@ -142,7 +175,7 @@ def collect_entries(data: dict, top_key: str, item_key: str) -> list[dict]:
             )
             if side not in VALID_SIDES:
                 raise ValueError(
-                    f"{top_key}.{category}.{item_key}[{i}].side must be one of {sorted(VALID_SIDES)}"
+                    f"{top_key}.{category}.{item_key}[{i}].side must be one of {VALID_SIDES_SORTED}"
                 )
 
             version = raw_item.get("version")
@@ -165,6 +198,16 @@ def collect_entries(data: dict, top_key: str, item_key: str) -> list[dict]:
     return flattened
 
 
+def collect_all_entries(data: dict, sections: dict[str, str]) -> dict[str, list[dict]]:
+    collected: dict[str, list[dict]] = {top_key: [] for top_key in sections}
+    for top_key, top in data.items():
+        item_key = sections.get(top_key)
+        if item_key is not None:
+            collected[top_key] = collect_entries(top, top_key, item_key)
+    return collected
+
+
+@functools.lru_cache(maxsize=1024)
 def parse_project_id(url: str) -> str:
     parsed = urllib.parse.urlparse(url)
     parts = [part for part in parsed.path.split("/") if part]
@@ -173,20 +216,162 @@ def parse_project_id(url: str) -> str:
     return parts[1]
 
 
-def request_json(url: str) -> object:
-    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+def get_connection(host: str) -> http.client.HTTPSConnection:
+    connections = getattr(_CONNECTIONS, "by_host", None)
+    if connections is None:
+        connections = _CONNECTIONS.by_host = {}
+
+    conn = connections.get(host)
+    if conn is None:
+        conn = connections[host] = http.client.HTTPSConnection(host, timeout=REQUEST_TIMEOUT)
+    return conn
+
+
+def uses_proxy(host: str) -> bool:
+    proxy = urllib.request.getproxies().get("https")
+    return bool(proxy) and not urllib.request.proxy_bypass(host)
+
+
+def send_urllib_request(
+    url: str, headers: dict[str, str]
+) -> tuple[int, http.client.HTTPMessage, bytes]:
+    req = urllib.request.Request(url, headers=headers)
     try:
-        with urllib.request.urlopen(req, timeout=30) as resp:
-            return json.loads(resp.read().decode("utf-8"))
+        with _OPENER.open(req, timeout=REQUEST_TIMEOUT) as resp:
+            return resp.status, resp.headers, resp.read()
     except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return exc.code, exc.headers, b""
         raise RuntimeError(f"Modrinth API returned {exc.code} for {url}") from exc
     except urllib.error.URLError as exc:
         raise RuntimeError(f"Network error while requesting {url}: {exc}") from exc
 
 
-def fetch_versions(project_id: str) -> list[dict]:
+def send_request(
+    url: str, headers: dict[str, str] | None = None
+) -> tuple[int, http.client.HTTPMessage, bytes]:
+    parsed = urllib.parse.urlsplit(url)
+    req_headers = {"User-Agent": USER_AGENT, **(headers or {})}
+    if parsed.scheme != "https" or uses_proxy(parsed.netloc):
+        return send_urllib_request(url, req_headers)
+
+    target = f"{parsed.path}?{parsed.query}" if parsed.query else parsed.path
+    conn = get_connection(parsed.netloc)
+    while True:
+        reused = conn.sock is not None
+        try:
+            conn.request("GET", target, headers=req_headers)
+            resp = conn.getresponse()
+            body = resp.read()
+            break
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as exc:
+            conn.close()
+            # The server may have closed an idle keep-alive connection; retry
+            # once on a fresh one, but never retry a fresh connection's failure.
+            if not reused:
+                raise RuntimeError(f"Network error while requesting {url}: {exc}") from exc
+        except (OSError, http.client.HTTPException) as exc:
+            conn.close()
+            raise RuntimeError(f"Network error while requesting {url}: {exc}") from exc
+
+    if resp.status in REDIRECT_STATUSES and resp.headers.get("Location"):
+        location = urllib.parse.urljoin(url, resp.headers["Location"])
+        return send_urllib_request(location, req_headers)
+    if resp.status != 304 and not 200 <= resp.status < 300:
+        raise RuntimeError(f"Modrinth API returned {resp.status} for {url}")
+    return resp.status, resp.headers, body
+
+
+def request_json(url: str) -> object:
+    _, _, body = send_request(url)
+    return json.loads(body.decode("utf-8"))
+
+
+def read_cache(path: Path) -> dict | None:
+    try:
+        raw = path.read_bytes()
+        cached = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or "body" not in cached:
+        return None
+    return cached
+
+
+def write_cache(path: Path, cached: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file first so a concurrent reader never sees a partial file.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(cached, f)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def cached_request_json(url: str, cache_path: Path | None, readonly: bool = False) -> object:
+    if cache_path is None:
+        return request_json(url)
+
+    cached = read_cache(cache_path)
+    headers: dict[str, str] = {}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    status, resp_headers, body = send_request(url, headers)
+    if status == 304 and cached is not None:
+        return cached["body"]
+
+    data = json.loads(body.decode("utf-8"))
+    etag = resp_headers.get("ETag")
+    last_modified = resp_headers.get("Last-Modified")
+    if not readonly and (etag or last_modified):
+        # The cache is only an optimisation; an unwritable cache dir must not
+        # fail a resolve whose response is already in hand.
+        try:
+            write_cache(
+                cache_path,
+                {"url": url, "etag": etag, "last_modified": last_modified, "body": data},
+            )
+        except OSError:
+            pass
+    return data
+
+
+def fetch_projects_bulk(ids: list[str]) -> dict[str, dict]:
+    query = urllib.parse.urlencode({"ids": json.dumps(ids, separators=(",", ":"))})
+    data = request_json(f"https://api.modrinth.com/v2/projects?{query}")
+    if not isinstance(data, list):
+        raise RuntimeError("Unexpected bulk projects response")
+
+    # Entries may reference a project by id or by slug, so index both. Slugs
+    # match case-insensitively on Modrinth and are stored lowercased; ids are
+    # case-sensitive and are written last so an exact id always wins.
+    items = [
+        item for item in data if isinstance(item, dict) and isinstance(item.get("id"), str)
+    ]
+    projects: dict[str, dict] = {}
+    for item in items:
+        if isinstance(item.get("slug"), str):
+            projects[item["slug"].lower()] = item
+    for item in items:
+        projects[item["id"]] = item
+    return projects
+
+
+def fetch_versions(
+    project_id: str, cache_dir: Path | None = None, cache_readonly: bool = False
+) -> list[dict]:
     url = f"https://api.modrinth.com/v2/project/{project_id}/version"
-    data = request_json(url)
+    # The cache is keyed by project only: version pins are applied client-side
+    # by select_version, so they never change what this endpoint returns.
+    cache_path = cache_dir / f"{project_id}.json" if cache_dir is not None else None
+    data = cached_request_json(url, cache_path, readonly=cache_readonly)
     if not isinstance(data, list):
         raise RuntimeError(f"Unexpected versions response for project '{project_id}'")
 
@@ -212,7 +397,8 @@ def filter_versions(
 
 
 def parse_timestamp(ts: str) -> dt.datetime:
-    return dt.datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    # Python 3.11+ accepts the trailing "Z" UTC designator directly.
+    return dt.datetime.fromisoformat(ts)
 
 
 def version_sort_key(version: dict) -> dt.datetime:
@@ -231,8 +417,7 @@ def select_version(versions: list[dict], version_number: str | None) -> dict:
             matched.sort(key=version_sort_key, reverse=True)
         return matched[0]
 
-    versions_sorted = sorted(versions, key=version_sort_key, reverse=True)
-    return versions_sorted[0]
+    return max(versions, key=version_sort_key)
 
 
 def select_file(version_data: dict) -> dict:
@@ -285,23 +470,56 @@ def build_lock_entry(file_obj: dict, side: str) -> dict:
     }
 
 
+def lookup_project(projects: dict[str, dict], entry: dict) -> dict:
+    project_id = parse_project_id(entry["url"])
+    project = projects.get(project_id) or projects.get(project_id.lower())
+    if project is None:
+        raise ValueError(f"Modrinth project not found: {entry['url']}")
+    return project
+
+
+def fetch_all_versions(
+    project_ids: list[str], cache_dir: Path | None, cache_readonly: bool = False
+) -> dict[str, list[dict]]:
+    if not project_ids:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(project_ids))) as executor:
+        fetched = executor.map(
+            lambda project_id: fetch_versions(project_id, cache_dir, cache_readonly),
+            project_ids,
+        )
+        return dict(zip(project_ids, fetched))
+
+
+def finalize(
+    entry: dict, versions: list[dict], minecraft: str, loader: str, require_loader: bool
+) -> dict:
+    filtered_versions = filter_versions(
+        versions,
+        minecraft=minecraft,
+        loader=loader if require_loader else None,
+    )
+    selected_version = select_version(filtered_versions, entry.get("version"))
+    selected_file = select_file(selected_version)
+    return build_lock_entry(selected_file, entry["side"])
+
+
 def resolve_entries(
-    entries: list[dict], minecraft: str, loader: str, label: str, require_loader: bool
+    entries: list[dict],
+    projects: dict[str, dict],
+    versions_by_id: dict[str, list[dict]],
+    minecraft: str,
+    loader: str,
+    label: str,
+    require_loader: bool,
 ) -> list[dict]:
     resolved: list[dict] = []
     seen_filenames: set[str] = set()
 
     for i, entry in enumerate(entries):
-        project_id = parse_project_id(entry["url"])
-        versions = fetch_versions(project_id)
-        filtered_versions = filter_versions(
-            versions,
-            minecraft=minecraft,
-            loader=loader if require_loader else None,
-        )
-        selected_version = select_version(filtered_versions, entry.get("version"))
-        selected_file = select_file(selected_version)
-        lock_entry = build_lock_entry(selected_file, entry["side"])
+        versions = versions_by_id[lookup_project(projects, entry)["id"]]
+        lock_entry = finalize(entry, versions, minecraft, loader, require_loader)
 
         filename = lock_entry["filename"]
         if filename in seen_filenames:
@@ -317,24 +535,27 @@ def resolve_entries(
     return resolved
 
 
-def main() -> int:
-    args = parse_args()
+def main(argv: list[str] | None = None, pack_data: dict | None = None) -> int:
+    args = parse_args(argv)
 
-    pack_path = Path(args.pack)
-    if not pack_path.exists():
-        raise FileNotFoundError(f"Pack config not found: {pack_path}")
+    if pack_data is None:
+        pack_path = Path(args.pack)
+        if not pack_path.exists():
+            raise FileNotFoundError(f"Pack config not found: {pack_path}")
+        pack_data = read_toml(pack_path)
 
-    data = read_toml(pack_path)
+    data = pack_data
     template, minecraft, loader = parse_template(data)
 
-    mods_entries = collect_entries(data, "mods", "mods")
-    resource_pack_entries = collect_entries(data, "resourcepacks", "packs")
-    shader_pack_entries = collect_entries(data, "shaderpacks", "packs")
+    entries_by_section = collect_all_entries(data, CONTENT_SECTIONS)
 
     locks = {
-        "mods": (mods_entries, Path(args.mods_lock)),
-        "resourcepacks": (resource_pack_entries, Path(args.resource_packs_lock)),
-        "shaderpacks": (shader_pack_entries, Path(args.shader_packs_lock)),
+        "mods": (entries_by_section["mods"], Path(args.mods_lock)),
+        "resourcepacks": (
+            entries_by_section["resourcepacks"],
+            Path(args.resource_packs_lock),
+        ),
+        "shaderpacks": (entries_by_section["shaderpacks"], Path(args.shader_packs_lock)),
     }
 
     targets = (
@@ -350,13 +571,24 @@ def main() -> int:
             write_json(Path(args.template_out), template)
             print(f"Rendered template -> {args.template_out}")
 
-    for target in ("mods", "resourcepacks", "shaderpacks"):
-        if target not in targets:
-            continue
+    resolve_targets = [t for t in ("mods", "resourcepacks", "shaderpacks") if t in targets]
+    all_entries = [entry for target in resolve_targets for entry in locks[target][0]]
+    project_ids = sorted({parse_project_id(entry["url"]) for entry in all_entries})
+    projects = fetch_projects_bulk(project_ids) if project_ids else {}
+
+    # Unknown projects fail here, before any version request. Each project is
+    # fetched once even when several entries (or sections) reference it.
+    unique_ids = sorted({lookup_project(projects, entry)["id"] for entry in all_entries})
+    cache_dir = None if args.no_cache else Path(args.cache_dir)
+    # --check promises not to write anything, so it only reads the cache.
+    versions_by_id = fetch_all_versions(unique_ids, cache_dir, cache_readonly=args.check)
 
+    for target in resolve_targets:
         entries, lock_path = locks[target]
         resolved = resolve_entries(
             entries,
+            projects,
+            versions_by_id,
             minecraft,
             loader,
             target,